@@ -11,6 +11,7 @@ Solar index information, currently focused on TIMED/SEE EUV spectra
 Classes
 ---------------------------------------------------------------------------
 SolarIndex    Solar Index data
+IndexCatalog  Registry of index sources with a shared dataset cache
 """
 from os import path
 
@@ -20,8 +21,11 @@ _ROOT = path.abspath(path.dirname(__file__))
 _data_dir = path.join(_ROOT, "data")
 
 try:
-    from solar_index import (spectral_data, omni_data, utils)
+    from solar_index import (spectral_data, omni_data, utils, catalog,
+                             export)
     from solar_index.spectral_data import EUVspectra
-    from solar_index.omni_data import OMNIvals
+    from solar_index.omni_data import OMNIvals, F107vals
+    from solar_index.catalog import (IndexCatalog, load_index,
+                                     index_attributes)
 except ImportError as err:
     raise ImportError('problem importing solar_index: ' + str(err))
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Catalog of solar index sources with a shared cache of loaded datasets
+
+Classes
+-------------------------------------------------------------------------------
+IndexCatalog : Registry of index sources with a bounded LRU dataset cache
+
+Functions
+-------------------------------------------------------------------------------
+load_index : Load a source through the process-wide default catalog
+index_attributes : List the daily index attributes of a loaded dataset
+freeze_dataset : Mark the array attributes of a loaded dataset as read-only
+-------------------------------------------------------------------------------
+
+Notes
+-------------------------------------------------------------------------------
+Datasets returned by the catalog are shared between all callers in a process.
+Their array attributes are read-only; copy an array before modifying it.
+-------------------------------------------------------------------------------
+"""
+
+from collections import OrderedDict
+from os import path
+import threading
+import numpy as np
+
+
+def freeze_dataset(dataset):
+    """ Mark the array attributes of a loaded dataset as read-only
+
+    Parameters
+    ----------
+    dataset : (object)
+        Loaded dataset, such as an OMNIvals or EUVspectra object
+
+    Returns
+    -------
+    dataset : (object)
+        The same object, with all np.ndarray attributes (including those
+        stored in dictionary attributes) flagged as not writeable
+    """
+    for attr in dataset.__dict__.values():
+        values = attr.values() if isinstance(attr, dict) else [attr]
+        for val in values:
+            if isinstance(val, np.ndarray):
+                val.flags.writeable = False
+
+    return dataset
+
+
+def index_attributes(name, dataset):
+    """ List the daily index attributes of a loaded dataset
+
+    Parameters
+    ----------
+    name : (str)
+        Source name, used in the error message
+    dataset : (object)
+        OMNIvals, F107vals, or EUVspectra object
+
+    Returns
+    -------
+    attrs : (list)
+        List of attribute names holding a value for each time.  EUVspectra
+        also hold the integrated power for each species in their power
+        attribute.
+    """
+    from solar_index.omni_data import OMNIvals, F107vals
+    from solar_index.spectral_data import EUVspectra
+
+    if isinstance(dataset, OMNIvals):
+        attrs = ['Rz', 'F107', 'Lalpha']
+    elif isinstance(dataset, F107vals):
+        attrs = ['F107']
+    elif isinstance(dataset, EUVspectra):
+        attrs = ['cor_1au', 'He2']
+    else:
+        raise TypeError("unsupported {:s} data of type {:}".format(
+            name, type(dataset)))
+
+    return attrs
+
+
+class IndexCatalog(object):
+    """ Registry of solar index sources with a bounded, thread-safe LRU cache
+
+    Parameters
+    ----------
+    maxsize : (int)
+        Maximum number of loaded datasets to keep in the cache (default=8)
+    register_defaults : (bool)
+        Register the bundled OMNI, F10.7, and SEE L3 sources (default=True)
+
+    Attributes
+    ----------
+    maxsize : (int)
+        Maximum number of loaded datasets kept in the cache
+    hits : (int)
+        Number of load requests answered from the cache
+    misses : (int)
+        Number of load requests that required reading a file
+
+    Methods
+    -------
+    register(name, loader, **kwargs)
+        Register a source name with a loader and default keyword arguments
+    unregister(name)
+        Remove a source and any of its cached datasets
+    sources()
+        List the registered source names
+    load(name, **kwargs)
+        Return the loaded dataset for a source, reading it only if needed
+    cached_keys()
+        List the cache keys, from least to most recently used
+    clear()
+        Empty the cache
+    """
+    def __init__(self, maxsize=8, register_defaults=True):
+
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._sources = dict()
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = dict()
+
+        if register_defaults:
+            from solar_index import _data_dir
+            from solar_index.omni_data import OMNIvals, F107vals
+            from solar_index.spectral_data import EUVspectra
+
+            # Defaults are stated explicitly, so that requests that do or do
+            # not name the default file share the same cache entry
+            self.register('omni', OMNIvals, file_dir=_data_dir,
+                          file_name='omni2_daily_12664.txt')
+            self.register('f107', F107vals, file_dir=_data_dir,
+                          file_name='f107.txt')
+            self.register('see', EUVspectra, file_dir=_data_dir,
+                          file_name='latest_see_L3_merged.ncdf')
+
+    def register(self, name, loader, **kwargs):
+        """ Register a source with a loader and default keyword arguments
+
+        Parameters
+        ----------
+        name : (str)
+            Source name, case insensitive
+        loader : (callable)
+            Class or function that accepts keyword arguments and returns the
+            loaded dataset (eg, OMNIvals)
+        **kwargs :
+            Default keyword arguments passed to the loader, such as
+            file_dir and file_name
+
+        Returns
+        -------
+        Void
+        """
+        if not callable(loader):
+            raise TypeError("loader for {:s} is not callable".format(name))
+
+        name = name.lower()
+        with self._lock:
+            self._drop_source(name)
+            self._sources[name] = (loader, self._norm_kwargs(kwargs))
+
+    def unregister(self, name):
+        """ Remove a source and any of its cached datasets
+
+        Parameters
+        ----------
+        name : (str)
+            Source name, case insensitive
+
+        Returns
+        -------
+        Void
+        """
+        name = name.lower()
+        with self._lock:
+            if name not in self._sources:
+                raise KeyError("unknown source {:s}".format(name))
+            self._drop_source(name)
+            del self._sources[name]
+
+    def sources(self):
+        """ List the registered source names
+
+        Returns
+        -------
+        names : (list)
+            Sorted list of registered source names
+        """
+        with self._lock:
+            return sorted(self._sources.keys())
+
+    def load(self, name, **kwargs):
+        """ Return the loaded dataset for a source, reading it only if needed
+
+        Parameters
+        ----------
+        name : (str)
+            Source name, case insensitive
+        **kwargs :
+            Keyword arguments passed to the loader, overriding the defaults
+            supplied at registration
+
+        Returns
+        -------
+        dataset : (object)
+            Shared, read-only dataset returned by the source loader
+        """
+        name = name.lower()
+        with self._lock:
+            if name not in self._sources:
+                raise KeyError("unknown source {:s}".format(name))
+            loader, defaults = self._sources[name]
+            options = dict(defaults)
+            options.update(self._norm_kwargs(kwargs))
+            key = (name, tuple(sorted(options.items())))
+
+            if key in self._cache:
+                self.hits += 1
+                self._touch(key)
+                return self._cache[key]
+
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Read the file outside the catalog lock, so that loads of different
+        # sources may proceed at the same time.  The per-key lock ensures
+        # that concurrent requests for the same dataset only read it once.
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    self.hits += 1
+                    self._touch(key)
+                    return self._cache[key]
+
+            try:
+                dataset = freeze_dataset(loader(**options))
+            except Exception:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+
+            with self._lock:
+                self.misses += 1
+                self._key_locks.pop(key, None)
+                if self._sources.get(name, (None,))[0] is loader:
+                    self._cache[key] = dataset
+                    while len(self._cache) > self.maxsize:
+                        self._cache.popitem(last=False)
+
+        return dataset
+
+    def cached_keys(self):
+        """ List the cache keys, from least to most recently used
+
+        Returns
+        -------
+        keys : (list)
+            List of (name, options) tuples
+        """
+        with self._lock:
+            return list(self._cache.keys())
+
+    def clear(self):
+        """ Empty the cache and reset the hit and miss counters
+
+        Returns
+        -------
+        Void
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _touch(self, key):
+        """ Mark a cache key as most recently used
+        """
+        self._cache[key] = self._cache.pop(key)
+
+    def _drop_source(self, name):
+        """ Remove all cached datasets for a source name
+        """
+        for key in [kk for kk in self._cache.keys() if kk[0] == name]:
+            del self._cache[key]
+
+    @staticmethod
+    def _norm_kwargs(kwargs):
+        """ Normalise loader keyword arguments for use in a cache key
+
+        Keyword names are lower-cased, as the loaders treat them
+        insensitively, and file_dir is made absolute, so that equivalent
+        paths share a cache entry.
+        """
+        options = dict()
+        for kk in kwargs.keys():
+            val = kwargs[kk]
+            if kk.lower() == 'file_dir':
+                val = path.abspath(path.normpath(val))
+
+            try:
+                hash(val)
+            except TypeError:
+                raise TypeError("unable to cache option {:s}, {:} values are "
+                                "not hashable".format(kk, type(val)))
+
+            options[kk.lower()] = val
+
+        return options
+
+
+# Process-wide catalog shared by all callers of load_index
+default_catalog = IndexCatalog()
+
+
+def load_index(name, **kwargs):
+    """ Load a source through the process-wide default catalog
+
+    Parameters
+    ----------
+    name : (str)
+        Registered source name (eg, 'omni', 'f107', 'see')
+    **kwargs :
+        Keyword arguments passed to the source loader
+
+    Returns
+    -------
+    dataset : (object)
+        Shared, read-only dataset returned by the source loader
+    """
+    return default_catalog.load(name, **kwargs)
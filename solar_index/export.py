@@ -0,0 +1,463 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Export derived solar indices to chunked, compressed stores
+
+Functions
+-------------------------------------------------------------------------------
+daily_indices : Align the indices from several datasets on a daily time grid
+to_hdf5 : Write daily indices and optional rebinned spectra to an HDF5 file
+to_zarr : Write daily indices and optional rebinned spectra to a Zarr store
+to_parquet : Write daily indices to a directory of Parquet files
+-------------------------------------------------------------------------------
+
+Notes
+-------------------------------------------------------------------------------
+Requires h5py, zarr, or pyarrow for the respective output formats.
+
+Columns are named '<source>_<attribute>', such as 'omni_F107' or
+'see_power_o', where the source is the key used in the datasets dictionary.
+Rebinned spectra are stored as '<source>_spectra', with shape (time, bin).
+
+The HDF5 and Zarr stores hold a 'date' array in days since 1970-01-01, while
+Parquet files hold a 'date' column of type date32.  All stores are written
+chunk_days at a time, and may be appended to with days later than the last
+day already stored.
+-------------------------------------------------------------------------------
+"""
+
+from collections import OrderedDict
+import numpy as np
+
+
+def _source_columns(name, dataset):
+    """ List the exported columns for a loaded dataset
+
+    Parameters
+    ----------
+    name : (str)
+        Source name used as the column prefix
+    dataset : (object)
+        OMNIvals, F107vals, or EUVspectra object
+
+    Returns
+    -------
+    columns : (list)
+        List of (column name, np.ndarray) tuples
+    """
+    from solar_index.catalog import index_attributes
+    from solar_index.spectral_data import EUVspectra
+
+    columns = [("{:s}_{:s}".format(name, aa), getattr(dataset, aa))
+               for aa in index_attributes(name, dataset)]
+
+    if isinstance(dataset, EUVspectra):
+        columns.extend([("{:s}_power_{:s}".format(name, ss),
+                         dataset.power[ss]) for ss in dataset.species])
+
+    return columns
+
+
+def _dataset_dates(dataset):
+    """ Daily dates for each time in a loaded dataset
+
+    Parameters
+    ----------
+    dataset : (object)
+        Loaded dataset with a dt attribute
+
+    Returns
+    -------
+    dates : (np.ndarray)
+        Array of np.datetime64 values with daily resolution
+    """
+    return np.array([tt.date() for tt in dataset.dt], dtype='datetime64[D]')
+
+
+def daily_indices(datasets=None, start=None, stop=None):
+    """ Align the indices from several datasets on a daily time grid
+
+    Parameters
+    ----------
+    datasets : (dict or NoneType)
+        Dictionary of loaded datasets, keyed by source name.  If None, the
+        'omni' and 'f107' sources are loaded from the default catalog.
+        (default=None)
+    start : (dt.datetime or NoneType)
+        First day to include, or None to start with the earliest day
+        (default=None)
+    stop : (dt.datetime or NoneType)
+        Last day to include, or None to end with the latest day (default=None)
+
+    Returns
+    -------
+    dates : (np.ndarray)
+        Sorted array of every day with data in any dataset (datetime64[D])
+    columns : (OrderedDict)
+        Index values for each column, with np.nan for days without data.
+        Values from several times within the same day are averaged.
+    """
+    if datasets is None:
+        from solar_index.catalog import load_index
+        datasets = OrderedDict([('omni', load_index('omni')),
+                                ('f107', load_index('f107'))])
+
+    if len(datasets) == 0:
+        raise ValueError("no datasets to export")
+
+    # Select the columns first, to reject unsupported datasets
+    source_columns = {name: _source_columns(name, datasets[name])
+                      for name in datasets.keys()}
+
+    # Construct the daily time grid
+    source_dates = {name: _dataset_dates(datasets[name])
+                    for name in datasets.keys()}
+    dates = np.unique(np.concatenate(list(source_dates.values())))
+
+    if start is not None:
+        dates = dates[dates >= np.datetime64(start, 'D')]
+    if stop is not None:
+        dates = dates[dates <= np.datetime64(stop, 'D')]
+
+    # Average each column onto the time grid
+    columns = OrderedDict()
+    for name in sorted(datasets.keys()):
+        days, inverse = np.unique(source_dates[name], return_inverse=True)
+        in_grid = np.isin(days, dates)
+        grid_ind = np.searchsorted(dates, days[in_grid])
+
+        for cname, values in source_columns[name]:
+            values = np.asarray(values, dtype=float)
+            good = np.isfinite(values)
+            total = np.bincount(inverse[good], weights=values[good],
+                                minlength=len(days))
+            count = np.bincount(inverse[good], minlength=len(days))
+
+            columns[cname] = np.full(shape=dates.shape, fill_value=np.nan)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                columns[cname][grid_ind] = (total / count)[in_grid]
+
+    return dates, columns
+
+
+def _spectra_sources(datasets, include_spectra):
+    """ Select the EUVspectra datasets whose rebinned spectra are exported
+
+    Parameters
+    ----------
+    datasets : (dict)
+        Dictionary of loaded datasets, keyed by source name
+    include_spectra : (bool)
+        Export the rebinned spectra
+
+    Returns
+    -------
+    spectra : (OrderedDict)
+        EUVspectra datasets keyed by '<source>_spectra'
+    """
+    from solar_index.spectral_data import EUVspectra
+
+    spectra = OrderedDict()
+    if include_spectra:
+        for name in sorted(datasets.keys()):
+            if isinstance(datasets[name], EUVspectra):
+                spectra["{:s}_spectra".format(name)] = datasets[name]
+
+        if len(spectra) == 0:
+            raise ValueError("include_spectra requires an EUVspectra dataset")
+
+    return spectra
+
+
+def _spectra_chunk(euv, euv_dates, dates, i0, i1):
+    """ Rebin the spectra for one chunk of the daily time grid
+
+    Parameters
+    ----------
+    euv : (EUVspectra)
+        Loaded EUV spectra
+    euv_dates : (np.ndarray)
+        Daily dates for each EUV spectrum (datetime64[D])
+    dates : (np.ndarray)
+        Daily time grid (datetime64[D])
+    i0 : (int)
+        Index of the first day in the chunk
+    i1 : (int)
+        Index after the last day in the chunk
+
+    Returns
+    -------
+    bin_flux : (np.ndarray)
+        Binned flux with shape (i1 - i0, bin), np.nan for days without data.
+        As for the index columns, spectra within the same day are averaged.
+    """
+    j0 = np.searchsorted(euv_dates, dates[i0], side='left')
+    j1 = np.searchsorted(euv_dates, dates[i1 - 1], side='right')
+
+    shape = (i1 - i0, euv.bins.shape[1])
+    total = np.zeros(shape=shape)
+    count = np.zeros(shape=shape)
+    if j1 > j0:
+        grid_ind = np.searchsorted(dates, euv_dates[j0:j1]) - i0
+        values = euv.rebin_spectra(start=j0, stop=j1)
+        good = np.isfinite(values)
+        np.add.at(total, grid_ind, np.where(good, values, 0.0))
+        np.add.at(count, grid_ind, good)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bin_flux = (total / count).astype(np.float32)
+
+    return bin_flux
+
+
+def _write_chunked(group, create, dates, columns, spectra, chunk_days,
+                   append):
+    """ Write the daily indices and spectra to an HDF5 or Zarr group
+
+    Parameters
+    ----------
+    group : (h5py.File or zarr.Group)
+        Open, writeable group
+    create : (function)
+        Function that creates a resizable array in the group, taking the
+        group, array name, shape, chunks, dtype, and fill value
+    dates : (np.ndarray)
+        Daily time grid (datetime64[D])
+    columns : (OrderedDict)
+        Index values for each column
+    spectra : (OrderedDict)
+        EUVspectra datasets keyed by output array name
+    chunk_days : (int)
+        Number of days written at a time, also used as the chunk size
+    append : (bool)
+        Append to existing arrays rather than creating new ones
+
+    Returns
+    -------
+    nrows : (int)
+        Number of days written
+    """
+    days = dates.astype(np.int64)
+    names = ['date'] + list(columns.keys()) + list(spectra.keys())
+
+    if append and 'date' in group:
+        # Every stored array must be extended, or their lengths will differ
+        stored = sorted(group.keys())
+        if stored != sorted(names):
+            raise ValueError("unable to append, stored arrays {:} differ "
+                             "from {:}".format(stored, sorted(names)))
+
+        # Only write days after the last stored day
+        if group['date'].shape[0] > 0:
+            days = days[days > group['date'][-1]]
+    else:
+        create(group, 'date', (0,), (chunk_days,), np.int64, None)
+        group['date'].attrs['units'] = 'days since 1970-01-01'
+
+        for cname in columns.keys():
+            create(group, cname, (0,), (chunk_days,), np.float64, np.nan)
+
+        for sname, euv in spectra.items():
+            nbins = euv.bins.shape[1]
+            create(group, sname, (0, nbins), (chunk_days, nbins), np.float32,
+                   np.nan)
+            group[sname].attrs['bin_min'] = [float(bb) for bb in euv.bins[0]]
+            group[sname].attrs['bin_max'] = [float(bb) for bb in euv.bins[1]]
+            group[sname].attrs['units'] = 'W m-2'
+
+    # Stream the data to the store one chunk at a time
+    euv_dates = {sname: _dataset_dates(spectra[sname])
+                 for sname in spectra.keys()}
+    offset = len(dates) - len(days)
+    for i0 in range(offset, len(dates), chunk_days):
+        i1 = min(i0 + chunk_days, len(dates))
+        chunk = OrderedDict([('date', dates[i0:i1].astype(np.int64))])
+        for cname in columns.keys():
+            chunk[cname] = columns[cname][i0:i1]
+        for sname, euv in spectra.items():
+            chunk[sname] = _spectra_chunk(euv, euv_dates[sname], dates, i0,
+                                          i1)
+
+        for name in names:
+            nold = group[name].shape[0]
+            group[name].resize((nold + i1 - i0,) + group[name].shape[1:])
+            group[name][nold:] = chunk[name]
+
+    return len(days)
+
+
+def to_hdf5(filename, datasets=None, include_spectra=False, append=False,
+            chunk_days=365, start=None, stop=None, compression='gzip'):
+    """ Write daily indices and optional rebinned spectra to an HDF5 file
+
+    Parameters
+    ----------
+    filename : (str)
+        Output HDF5 filename
+    datasets : (dict or NoneType)
+        Dictionary of loaded datasets, keyed by source name (default=None)
+    include_spectra : (bool)
+        Also write the rebinned spectra of each EUVspectra dataset
+        (default=False)
+    append : (bool)
+        Append days after the last stored day to an existing file, rather
+        than overwriting it (default=False)
+    chunk_days : (int)
+        Number of days per chunk (default=365)
+    start : (dt.datetime or NoneType)
+        First day to write (default=None)
+    stop : (dt.datetime or NoneType)
+        Last day to write (default=None)
+    compression : (str or NoneType)
+        h5py compression filter (default='gzip')
+
+    Returns
+    -------
+    nrows : (int)
+        Number of days written
+    """
+    import h5py
+
+    def create(group, name, shape, chunks, dtype, fill_value):
+        group.create_dataset(name, shape=shape, maxshape=(None,) + shape[1:],
+                             chunks=chunks, dtype=dtype, fillvalue=fill_value,
+                             compression=compression)
+
+    dates, columns = daily_indices(datasets, start=start, stop=stop)
+    spectra = _spectra_sources(datasets or dict(), include_spectra)
+
+    with h5py.File(filename, 'a' if append else 'w') as fout:
+        nrows = _write_chunked(fout, create, dates, columns, spectra,
+                               chunk_days, append)
+
+    return nrows
+
+
+def to_zarr(store, datasets=None, include_spectra=False, append=False,
+            chunk_days=365, start=None, stop=None):
+    """ Write daily indices and optional rebinned spectra to a Zarr store
+
+    Parameters
+    ----------
+    store : (str)
+        Output Zarr store path
+    datasets : (dict or NoneType)
+        Dictionary of loaded datasets, keyed by source name (default=None)
+    include_spectra : (bool)
+        Also write the rebinned spectra of each EUVspectra dataset
+        (default=False)
+    append : (bool)
+        Append days after the last stored day to an existing store, rather
+        than overwriting it (default=False)
+    chunk_days : (int)
+        Number of days per chunk (default=365)
+    start : (dt.datetime or NoneType)
+        First day to write (default=None)
+    stop : (dt.datetime or NoneType)
+        Last day to write (default=None)
+
+    Returns
+    -------
+    nrows : (int)
+        Number of days written
+    """
+    import zarr
+
+    def create(group, name, shape, chunks, dtype, fill_value):
+        # zarr v3 renamed create_dataset to create_array
+        create_array = getattr(group, 'create_array', None)
+        if create_array is None:
+            create_array = group.create_dataset
+        create_array(name, shape=shape, chunks=chunks, dtype=dtype,
+                     fill_value=fill_value)
+
+    dates, columns = daily_indices(datasets, start=start, stop=stop)
+    spectra = _spectra_sources(datasets or dict(), include_spectra)
+
+    group = zarr.open_group(store, mode='a' if append else 'w')
+    return _write_chunked(group, create, dates, columns, spectra, chunk_days,
+                          append)
+
+
+def to_parquet(path, datasets=None, append=False, chunk_days=365, start=None,
+               stop=None, compression='zstd'):
+    """ Write daily indices to a directory of Parquet files
+
+    Parameters
+    ----------
+    path : (str)
+        Output directory.  Each call writes one 'part-NNNNN.parquet' file.
+    datasets : (dict or NoneType)
+        Dictionary of loaded datasets, keyed by source name (default=None)
+    append : (bool)
+        Add a file with the days after the last stored day, rather than
+        replacing the existing files (default=False)
+    chunk_days : (int)
+        Number of days per row group (default=365)
+    start : (dt.datetime or NoneType)
+        First day to write (default=None)
+    stop : (dt.datetime or NoneType)
+        Last day to write (default=None)
+    compression : (str or NoneType)
+        Parquet compression codec (default='zstd')
+
+    Returns
+    -------
+    nrows : (int)
+        Number of days written
+    """
+    from glob import glob
+    from os import path as os_path, makedirs, remove
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dates, columns = daily_indices(datasets, start=start, stop=stop)
+    names = ['date'] + list(columns.keys())
+
+    if not os_path.isdir(path):
+        makedirs(path)
+    parts = sorted(glob(os_path.join(path, 'part-*.parquet')))
+
+    if append and len(parts) > 0:
+        stored = pq.read_schema(parts[0]).names
+        if stored != names:
+            raise ValueError("unable to append, stored columns {:} differ "
+                             "from {:}".format(stored, names))
+
+        # Only write days after the last stored day
+        last = max([pq.read_table(pp, columns=['date'])['date'].to_numpy(
+            zero_copy_only=False).max() for pp in parts])
+        keep = dates > np.datetime64(last, 'D')
+        dates = dates[keep]
+        columns = OrderedDict([(cc, columns[cc][keep])
+                               for cc in columns.keys()])
+    else:
+        for pp in parts:
+            remove(pp)
+        parts = list()
+
+    if len(dates) == 0:
+        return 0
+
+    # Stream the data to a new file one row group at a time
+    filename = os_path.join(path, 'part-{:05d}.parquet'.format(len(parts)))
+    writer = None
+    try:
+        for i0 in range(0, len(dates), chunk_days):
+            i1 = min(i0 + chunk_days, len(dates))
+            arrays = [pa.array(dates[i0:i1])]
+            arrays.extend([pa.array(columns[cc][i0:i1])
+                           for cc in columns.keys()])
+            table = pa.Table.from_arrays(arrays, names=names)
+
+            if writer is None:
+                writer = pq.ParquetWriter(filename, table.schema,
+                                          compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return len(dates)
@@ -8,6 +8,7 @@
 Classes
 -------------------------------------------------------------------------------
 OMNIvals
+F107vals
 
 Moduleauthor
 -------------------------------------------------------------------------------
@@ -108,3 +109,90 @@ class OMNIvals:
         self.Rz = data[:, 3]
         self.F107 = utils.replace_fill_array(data[:, 4], fill_value=999.9)
         self.Lalpha = data[:, 5]
+
+
+class F107vals:
+    """ Object containing the hourly-format OMNI F10.7 index
+
+    Keyword Arguments
+    ------------------
+        file_dir : (str)
+            Directory with data files (default=solar_index._data_dir)
+        file_name : (str)
+            Data filename (default='f107.txt')
+
+    Attributes
+    ----------
+    self.year : (np.array)
+        Integer year
+    self.day : (np.array)
+        Integer day
+    self.hour : (np.array)
+        Integer hour
+    self.dt : (np.array)
+        datetime
+    self.F107 : (np.array)
+        10.7 cm flux index in solar flux units
+
+    Methods
+    --------
+    load_f107_vals : Load the values from an ASCII file
+    """
+    def __init__(self, **kwargs):
+
+        try:
+            self.load_f107_vals(**kwargs)
+        except ImportError:
+            raise ImportError("unable to initiate F107vals class - ")
+
+    def load_f107_vals(self, **kwargs):
+        """ Load an ascii file with a header row into the F107vals class
+
+        Keyword Arguments
+        --------------------
+        file_dir : (str)
+            Directory with data files (default='data')
+        file_name : (str)
+            Data filename (default='f107.txt')
+
+        Returns
+        -------
+        Void
+        """
+
+        from os import path
+        from solar_index import utils, _data_dir
+
+        # Define the default data file and update using kwargs
+        file_dir = _data_dir
+        file_name = "f107.txt"
+
+        for kk in kwargs.keys():
+            if kk.lower() == "file_dir":
+                file_dir = kwargs[kk]
+            elif kk.lower() == "file_name":
+                file_name = kwargs[kk]
+
+        # Construct filename and load the data
+        if not path.isdir(file_dir):
+            raise OSError("unknown file directory {:s}".format(file_dir))
+        self.filename = path.join(file_dir, file_name)
+
+        if not path.isfile(self.filename):
+            raise OSError("unknown file {:s}".format(self.filename))
+
+        try:
+            data = np.loadtxt(self.filename, skiprows=1)
+        except ImportError:
+            estr = "unable to load ascii file {:s}".format(self.filename)
+            raise ImportError(estr)
+
+        self.year = data[:, 0]
+        self.day = data[:, 1]
+        self.hour = data[:, 2]
+        self.dt = np.array([dt.datetime(int(self.year[i]), 1, 1) +
+                            dt.timedelta(days=int(self.day[i])-1,
+                                         hours=int(self.hour[i]))
+                            for i in range(len(self.day))])
+
+        self.F107 = utils.replace_fill_array(data[:, 3], fill_value=999.9)
@@ -0,0 +1,634 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Local asyncio service answering solar index queries over HTTP/JSON
+
+Classes
+-------------------------------------------------------------------------------
+IndexServer : Serve index queries from datasets that are loaded once
+
+Functions
+-------------------------------------------------------------------------------
+load_test : Issue many concurrent queries to a running server
+main : Command line interface, 'serve' or 'loadtest'
+-------------------------------------------------------------------------------
+
+Notes
+-------------------------------------------------------------------------------
+Requires python 3.7 or later, and is not imported with solar_index.  Start
+the service with:
+
+    python -m solar_index.server serve --port 8080
+
+The TIMED/SEE L3 file is not bundled; to also serve the SEE indices, add
+--see-dir and/or --see-file.  Query the service with, for example:
+
+    GET /index?source=omni&index=F107&start=2003-01-01&stop=2003-12-31
+    GET /index?source=see&index=power&species=o
+    GET /index?source=see&index=spectra&start=2003-10-28&stop=2003-10-31
+    GET /sources
+    GET /stats
+
+Dates are given as YYYY-MM-DD and are inclusive.  Responses are JSON objects
+with 'source', 'index', 'species', 'dates', and 'values' keys, where missing
+values are null.  A 'spectra' query also returns the wavelength 'bins'.
+-------------------------------------------------------------------------------
+"""
+
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import datetime as dt
+import json
+import sys
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import numpy as np
+
+from solar_index.catalog import (IndexCatalog, default_catalog,
+                                 index_attributes)
+
+
+class IndexServer(object):
+    """ Serve index queries from datasets that are loaded once
+
+    Parameters
+    ----------
+    sources : (list)
+        Catalog source names to serve (default=('omni', 'f107'))
+    catalog : (IndexCatalog or NoneType)
+        Catalog used to load the sources, or None to use the process-wide
+        default catalog (default=None)
+    max_cache_bytes : (int)
+        Maximum total size of the cached responses (default=64 MB)
+    max_workers : (int or NoneType)
+        Number of worker threads used to build responses (default=None)
+    read_timeout : (float)
+        Seconds allowed for a client to send its request (default=10.0)
+
+    Attributes
+    ----------
+    datasets : (OrderedDict)
+        Loaded datasets, keyed by source name
+    stats : (dict)
+        Number of requests, cache hits, coalesced requests, and computed
+        responses
+
+    Methods
+    -------
+    load()
+        Load the datasets in the worker pool
+    query(source, index, species, start, stop)
+        Return the JSON response for a query
+    serve(host, port, path)
+        Load the datasets and start listening for requests
+    close()
+        Shut down the worker pool
+    """
+    def __init__(self, sources=('omni', 'f107'), catalog=None,
+                 max_cache_bytes=64 * 2**20, max_workers=None,
+                 read_timeout=10.0):
+
+        self.sources = [ss.lower() for ss in sources]
+        self.catalog = default_catalog if catalog is None else catalog
+        self.max_cache_bytes = max_cache_bytes
+        self.read_timeout = read_timeout
+
+        self.datasets = OrderedDict()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0,
+                      'computed': 0}
+
+        self._dates = dict()
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight = dict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def load(self):
+        """ Load the datasets in the worker pool
+        """
+        loop = asyncio.get_running_loop()
+        for name in self.sources:
+            if name not in self.datasets:
+                data = await loop.run_in_executor(self._executor,
+                                                  self.catalog.load, name)
+                self._dates[name] = np.array(data.dt, dtype='datetime64[s]')
+                self.datasets[name] = data
+
+    def _source_indices(self, source):
+        """ List the indices and species that may be queried for a source
+
+        Parameters
+        ----------
+        source : (str)
+            Loaded source name
+
+        Returns
+        -------
+        indices : (list)
+            Index names, including 'power' and 'spectra' for EUV spectra
+        species : (list or NoneType)
+            Species for the 'power' index, or None if there is no power
+        """
+        from solar_index.spectral_data import EUVspectra
+
+        data = self.datasets[source]
+        indices = list(index_attributes(source, data))
+        species = None
+        if isinstance(data, EUVspectra):
+            indices.extend(['power', 'spectra'])
+            species = list(data.species)
+
+        return indices, species
+
+    def _query_key(self, source=None, index=None, species=None, start=None,
+                   stop=None):
+        """ Validate a query and construct its cache key
+
+        Returns
+        -------
+        key : (tuple)
+            Tuple of (source, index, species, start, stop)
+        """
+        if source is None or index is None:
+            raise ValueError("query requires a source and an index")
+
+        source = source.lower()
+        if source not in self.datasets:
+            raise ValueError("unknown source {:s}".format(source))
+
+        indices, all_species = self._source_indices(source)
+        if index not in indices:
+            raise ValueError("unknown index {:s} for {:s}, expected one of "
+                             "{:}".format(index, source, indices))
+
+        if index == 'power':
+            if species not in all_species:
+                raise ValueError("power requires a species in {:}".format(
+                    all_species))
+        else:
+            species = None
+
+        # Normalise the dates, so equivalent queries share a key
+        dates = list()
+        for date in (start, stop):
+            if date is not None:
+                try:
+                    date = dt.datetime.strptime(date, '%Y-%m-%d').date()
+                except ValueError:
+                    raise ValueError("bad date {:s}, expected YYYY-MM-DD"
+                                     "".format(date))
+                date = date.isoformat()
+            dates.append(date)
+
+        return (source, index, species) + tuple(dates)
+
+    def _answer(self, source, index, species, start, stop):
+        """ Build the JSON response for a validated query
+
+        Runs in the worker pool, as the spectra must be rebinned and large
+        responses take a while to encode.
+
+        Returns
+        -------
+        body : (bytes)
+            UTF-8 encoded JSON response
+        """
+        data = self.datasets[source]
+        dates = self._dates[source]
+
+        i0 = 0 if start is None else \
+            np.searchsorted(dates, np.datetime64(start, 's'), side='left')
+        i1 = len(dates) if stop is None else \
+            np.searchsorted(dates, np.datetime64(stop, 's') +
+                            np.timedelta64(1, 'D'), side='left')
+
+        response = OrderedDict([('source', source), ('index', index),
+                                ('species', species)])
+        response['dates'] = [str(tt) for tt in dates[i0:i1]]
+
+        if index == 'spectra':
+            values = data.rebin_spectra(start=i0, stop=i1)
+            response['bins'] = data.bins.tolist()
+        elif index == 'power':
+            values = data.power[species][i0:i1]
+        else:
+            values = getattr(data, index)[i0:i1]
+
+        # JSON has no NaN, so missing values are returned as null
+        values = np.asarray(values, dtype=float)
+        response['values'] = np.where(np.isfinite(values), values,
+                                      None).tolist()
+
+        return json.dumps(response).encode('utf-8')
+
+    def _cache_get(self, key):
+        """ Return a cached response, or None if the key is not cached
+        """
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+        return body
+
+    def _cache_put(self, key, body):
+        """ Cache a response, evicting the least recently used responses
+        """
+        if len(body) > self.max_cache_bytes:
+            return
+
+        self._cache[key] = body
+        self._cache_bytes += len(body)
+        while self._cache_bytes > self.max_cache_bytes:
+            self._cache_bytes -= len(self._cache.popitem(last=False)[1])
+
+    async def query(self, **kwargs):
+        """ Return the JSON response for a query
+
+        Parameters
+        ----------
+        source : (str)
+            Source name (eg, 'omni', 'f107', 'see')
+        index : (str)
+            Index name (eg, 'F107', 'Rz', 'Lalpha', 'He2', 'power',
+            'spectra')
+        species : (str or NoneType)
+            Species for the 'power' index (eg, 'o', 'n2', 'o2', 'all')
+        start : (str or NoneType)
+            First day, as YYYY-MM-DD
+        stop : (str or NoneType)
+            Last day, as YYYY-MM-DD
+
+        Returns
+        -------
+        body : (bytes)
+            UTF-8 encoded JSON response
+
+        Notes
+        -----
+        Responses are cached.  Concurrent identical queries wait for the
+        same response rather than each building their own.
+        """
+        self.stats['requests'] += 1
+        key = self._query_key(**kwargs)
+
+        body = self._cache_get(key)
+        if body is not None:
+            self.stats['cache_hits'] += 1
+            return body
+
+        if key in self._inflight:
+            self.stats['coalesced'] += 1
+        else:
+            # The response is built in its own task, so that it completes
+            # for the coalesced queries even if the first query is cancelled
+            task = asyncio.get_running_loop().create_task(self._compute(key))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+
+        return await asyncio.shield(self._inflight[key])
+
+    async def _compute(self, key):
+        """ Build and cache the response for a validated query
+
+        Parameters
+        ----------
+        key : (tuple)
+            Tuple of (source, index, species, start, stop)
+
+        Returns
+        -------
+        body : (bytes)
+            UTF-8 encoded JSON response
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            body = await loop.run_in_executor(self._executor, self._answer,
+                                              *key)
+            self.stats['computed'] += 1
+            self._cache_put(key, body)
+        finally:
+            del self._inflight[key]
+
+        return body
+
+    async def _route(self, method, target):
+        """ Answer an HTTP request
+
+        Returns
+        -------
+        status : (str)
+            HTTP status line text
+        body : (bytes)
+            UTF-8 encoded JSON response
+        """
+        if method != 'GET':
+            return '405 Method Not Allowed', _error_body("only GET allowed")
+
+        url = urlsplit(target)
+        if url.path == '/index':
+            try:
+                params = dict(parse_qsl(url.query))
+                return '200 OK', await self.query(**params)
+            except (ValueError, TypeError) as err:
+                return '400 Bad Request', _error_body(str(err))
+        elif url.path == '/sources':
+            sources = OrderedDict()
+            for name in self.datasets.keys():
+                indices, species = self._source_indices(name)
+                sources[name] = {'indices': indices, 'species': species}
+            return '200 OK', json.dumps(sources).encode('utf-8')
+        elif url.path == '/stats':
+            stats = dict(self.stats)
+            stats['cached_responses'] = len(self._cache)
+            stats['cached_bytes'] = self._cache_bytes
+            return '200 OK', json.dumps(stats).encode('utf-8')
+
+        return '404 Not Found', _error_body("unknown path " + url.path)
+
+    async def _handle(self, reader, writer):
+        """ Read one HTTP request from a connection and write the response
+        """
+        try:
+            # Idle clients may not hold a connection open indefinitely
+            request = await asyncio.wait_for(_read_request(reader),
+                                             self.read_timeout)
+
+            if len(request) < 2:
+                status, body = '400 Bad Request', _error_body("bad request")
+            else:
+                status, body = await self._route(request[0], request[1])
+        except asyncio.TimeoutError:
+            status, body = '408 Request Timeout', _error_body(
+                "no request within {:g} s".format(self.read_timeout))
+        except Exception as err:
+            status, body = '500 Internal Server Error', _error_body(str(err))
+
+        header = ("HTTP/1.1 {:s}\r\nContent-Type: application/json\r\n"
+                  "Content-Length: {:d}\r\nConnection: close\r\n\r\n"
+                  "").format(status, len(body))
+        try:
+            writer.write(header.encode('latin-1') + body)
+            await writer.drain()
+        except OSError:
+            # The client has already gone away
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def serve(self, host='127.0.0.1', port=8080, path=None):
+        """ Load the datasets and start listening for requests
+
+        Parameters
+        ----------
+        host : (str)
+            Host address to listen on (default='127.0.0.1')
+        port : (int)
+            TCP port to listen on, or 0 for any free port (default=8080)
+        path : (str or NoneType)
+            Unix socket path to listen on instead of a TCP port
+            (default=None)
+
+        Returns
+        -------
+        server : (asyncio.Server)
+            Server that is accepting connections
+        """
+        await self.load()
+
+        # Allow for many clients connecting at once
+        if path is None:
+            return await asyncio.start_server(self._handle, host=host,
+                                              port=port, backlog=1024)
+        return await asyncio.start_unix_server(self._handle, path=path,
+                                               backlog=1024)
+
+    def close(self):
+        """ Shut down the worker pool
+        """
+        self._executor.shutdown(wait=True)
+
+
+async def _read_request(reader):
+    """ Read an HTTP request line and skip the headers
+
+    Returns
+    -------
+    request : (list)
+        Request line split into method, target and version
+    """
+    request = (await reader.readline()).decode('latin-1').split()
+
+    # The request headers are not used
+    line = await reader.readline()
+    while line not in (b'\r\n', b'\n', b''):
+        line = await reader.readline()
+
+    return request
+
+
+def _retrieve_exception(task):
+    """ Mark a task exception as retrieved, as no query may be awaiting it
+    """
+    if not task.cancelled():
+        task.exception()
+
+
+def _error_body(message):
+    """ UTF-8 encoded JSON error response
+    """
+    return json.dumps({'error': message}).encode('utf-8')
+
+
+async def _timed_request(host, port, path, target):
+    """ Issue one GET request and time the response
+
+    Returns
+    -------
+    status : (int)
+        HTTP status code
+    elapsed : (float)
+        Time taken in seconds
+    """
+    start = time.perf_counter()
+    if path is None:
+        reader, writer = await asyncio.open_connection(host, port)
+    else:
+        reader, writer = await asyncio.open_unix_connection(path)
+
+    writer.write("GET {:s} HTTP/1.1\r\nHost: {:s}\r\n\r\n".format(
+        target, host).encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    # An empty or malformed response counts as an error
+    try:
+        status = int(response.split(b' ', 2)[1])
+    except (IndexError, ValueError):
+        return None, np.nan
+
+    return status, time.perf_counter() - start
+
+
+async def load_test(host='127.0.0.1', port=8080, path=None, queries=None,
+                    clients=200, requests=5):
+    """ Issue many concurrent queries to a running server
+
+    Parameters
+    ----------
+    host : (str)
+        Server host address (default='127.0.0.1')
+    port : (int)
+        Server TCP port (default=8080)
+    path : (str or NoneType)
+        Server Unix socket path, used instead of the TCP port (default=None)
+    queries : (list or NoneType)
+        List of query parameter dicts, cycled through by the clients.  If
+        None, full-range F10.7, Rz and Lyman alpha queries are used.
+        (default=None)
+    clients : (int)
+        Number of clients starting at once (default=200)
+    requests : (int)
+        Number of sequential requests made by each client (default=5)
+
+    Returns
+    -------
+    results : (dict)
+        Number of requests and errors, elapsed time in seconds, requests per
+        second, and the median, 90th and 99th percentile, and maximum latency
+        in milliseconds
+    """
+    if queries is None:
+        queries = [{'source': 'omni', 'index': ii}
+                   for ii in ('F107', 'Rz', 'Lalpha')]
+    targets = ['/index?' + urlencode(qq) for qq in queries]
+
+    async def client(iclient):
+        results = list()
+        for ireq in range(requests):
+            target = targets[(iclient + ireq) % len(targets)]
+            try:
+                results.append(await _timed_request(host, port, path,
+                                                    target))
+            except OSError:
+                results.append((None, np.nan))
+        return results
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[client(ii) for ii in range(clients)])
+    elapsed = time.perf_counter() - start
+
+    status = np.array([rr[0] == 200 for cc in results for rr in cc])
+    latency = np.array([rr[1] for cc in results for rr in cc]) * 1000.0
+    latency = latency[status]
+    if len(latency) == 0:
+        latency = np.array([np.nan])
+    percentiles = np.percentile(latency, [50, 90, 99])
+
+    return OrderedDict([('requests', len(status)),
+                        ('errors', int(np.sum(~status))),
+                        ('elapsed_s', elapsed),
+                        ('requests_per_s', len(status) / elapsed),
+                        ('p50_ms', float(percentiles[0])),
+                        ('p90_ms', float(percentiles[1])),
+                        ('p99_ms', float(percentiles[2])),
+                        ('max_ms', float(np.max(latency)))])
+
+
+def main(argv=None):
+    """ Command line interface, 'serve' or 'loadtest'
+
+    Parameters
+    ----------
+    argv : (list or NoneType)
+        Command line arguments, or None to use sys.argv (default=None)
+    """
+    parser = argparse.ArgumentParser(prog='python -m solar_index.server',
+                                     description=__doc__.split('\n')[0])
+    parser.add_argument('command', choices=['serve', 'loadtest'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', default=None,
+                        help='Unix socket path, used instead of the port')
+    parser.add_argument('--source', action='append', default=None,
+                        help='catalog source to serve (default: omni, f107)')
+    parser.add_argument('--see-dir', default=None,
+                        help='directory with the TIMED/SEE L3 file; serves '
+                        'the see source')
+    parser.add_argument('--see-file', default=None,
+                        help='TIMED/SEE L3 file name; serves the see source')
+    parser.add_argument('--cache-mb', type=float, default=64.0,
+                        help='maximum size of the response cache')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--read-timeout', type=float, default=10.0,
+                        help='seconds allowed for a client to send a request')
+    parser.add_argument('--clients', type=int, default=200,
+                        help='loadtest: clients starting at once')
+    parser.add_argument('--requests', type=int, default=5,
+                        help='loadtest: requests made by each client')
+    args = parser.parse_args(argv)
+
+    if args.command == 'loadtest':
+        results = asyncio.run(load_test(host=args.host, port=args.port,
+                                        path=args.unix, clients=args.clients,
+                                        requests=args.requests))
+        for kk, vv in results.items():
+            print("{:s}: {:.6g}".format(kk, vv))
+        return
+
+    sources = args.source or ['omni', 'f107']
+
+    # The SEE L3 file is not bundled, so point the see source at it.  A
+    # private catalog keeps this from changing the process-wide sources.
+    catalog = IndexCatalog()
+    if args.see_dir is not None or args.see_file is not None:
+        from solar_index import _data_dir
+        from solar_index.spectral_data import EUVspectra
+
+        catalog.register(
+            'see', EUVspectra, file_dir=args.see_dir or _data_dir,
+            file_name=args.see_file or 'latest_see_L3_merged.ncdf')
+        if 'see' not in [ss.lower() for ss in sources]:
+            sources.append('see')
+
+    server = IndexServer(sources=sources, catalog=catalog,
+                         max_cache_bytes=int(args.cache_mb * 2**20),
+                         max_workers=args.workers,
+                         read_timeout=args.read_timeout)
+
+    async def run():
+        try:
+            await server.load()
+        except (OSError, ImportError, KeyError) as err:
+            return "unable to load the index sources: {:}".format(err)
+
+        try:
+            listener = await server.serve(host=args.host, port=args.port,
+                                          path=args.unix)
+        except OSError as err:
+            return "unable to start the server: {:}".format(err)
+
+        async with listener:
+            await listener.serve_forever()
+
+    message = None
+    try:
+        message = asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+    if message is not None:
+        sys.exit("{:s}: {:s}".format(parser.prog, message))
+
+
+if __name__ == '__main__':
+    main()
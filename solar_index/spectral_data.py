@@ -77,8 +77,12 @@ class EUVspectra(object):
         Load the EUV spectra from a TIMED/SEE file
     integrate_power(species)
         Integrate the power for selected species
+    rebin_spectra(start, stop)
+        Sums sp_flux over each wavelength bin for a range of times
     _integrate_bin(species, iarea)
         Integrates sp_flux over bin values
+    _bin_flux(ibin, start, stop)
+        Sums sp_flux over the wavelengths in a bin
     load_coeff(species)
         Generates bins of photoabsorption coefficients [Solomon et al, 2005].
     """
@@ -200,13 +204,57 @@ class EUVspectra(object):
             Integrated flux for bin
         """
 
-        d_lambda = 1.0  # nm
-        ind = (self.sp_wave >= self.bins[0, iarea]) &\
-              (self.sp_wave < self.bins[1, iarea])
-        iflux = self.area[species][iarea] * np.sum(self.sp_flux[:, ind],
-                                                   axis=1) * d_lambda
+        iflux = self.area[species][iarea] * self._bin_flux(iarea)
         return iflux
 
+    def _bin_flux(self, ibin, start=None, stop=None):
+        """ Sums sp_flux over the wavelengths in a bin
+
+        Parameters
+        ----------
+        ibin : (int)
+            Index of the bin to sum over
+        start : (int or NoneType)
+            Index of the first time to sum (default=None)
+        stop : (int or NoneType)
+            Index after the last time to sum (default=None)
+
+        Returns
+        -------
+        bflux : (np.ndarray)
+            Flux in the bin for each time
+        """
+
+        d_lambda = 1.0  # nm
+        ind = (self.sp_wave >= self.bins[0, ibin]) &\
+              (self.sp_wave < self.bins[1, ibin])
+        bflux = np.sum(self.sp_flux[start:stop, ind], axis=1) * d_lambda
+        return bflux
+
+    def rebin_spectra(self, start=None, stop=None):
+        """ Sums sp_flux over each wavelength bin for a range of times
+
+        Parameters
+        ----------
+        start : (int or NoneType)
+            Index of the first time to rebin (default=None)
+        stop : (int or NoneType)
+            Index after the last time to rebin (default=None)
+
+        Returns
+        -------
+        bin_flux : (np.ndarray)
+            Binned flux with shape (time, bin), using the bins in self.bins
+        """
+
+        ntimes = self.sp_flux[start:stop, :].shape[0]
+        bin_flux = np.empty(shape=(ntimes, self.bins.shape[1]))
+
+        for ibin in range(self.bins.shape[1]):
+            bin_flux[:, ibin] = self._bin_flux(ibin, start=start, stop=stop)
+
+        return bin_flux
+
     def load_coeff(self, species):
         """ Generates bins of photoabsorption coefficients using method
         described by Richards et al, 1994.
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Shared tools for the solar_index tests
+
+Functions
+-------------------------------------------------------------------------------
+synthetic_euv : Builds a small EUVspectra without reading a TIMED/SEE file
+-------------------------------------------------------------------------------
+"""
+
+import numpy as np
+
+
+def synthetic_euv(times, flux=None, he2=None, power=None):
+    """ Builds a small EUVspectra without reading a TIMED/SEE file
+
+    Parameters
+    ----------
+    times : (list)
+        List of datetimes, one for each spectrum
+    flux : (list or NoneType)
+        Flux of each spectrum, the same at every 1 nm wavelength, so that
+        each 5 nm bin holds five times this value (default=None, all 1)
+    he2 : (list or NoneType)
+        HeII emission for each time (default=None, 0, 1, 2, ...)
+    power : (dict or NoneType)
+        Power for each time, keyed by species, replacing the default power.
+        By default, 'all' is the sum of the rebinned spectra and 'o' is zero.
+        (default=None)
+
+    Returns
+    -------
+    euv : (EUVspectra)
+        EUVspectra with species 'all' and 'o', and the standard bins
+    """
+    from solar_index import EUVspectra
+
+    euv = EUVspectra.__new__(EUVspectra)
+    euv.dt = np.array(times)
+    euv.year = np.array([tt.year for tt in euv.dt])
+    euv.day = np.array([tt.timetuple().tm_yday for tt in euv.dt])
+    euv.sp_wave = np.arange(0.5, 195.0, 1.0)
+
+    flux = np.ones(shape=euv.dt.shape) if flux is None else np.array(flux)
+    euv.sp_flux = flux[:, np.newaxis] * np.ones(shape=euv.sp_wave.shape)
+
+    euv.cor_1au = np.ones(shape=euv.dt.shape)
+    euv.He2 = np.arange(len(euv.dt), dtype=float) if he2 is None \
+        else np.array(he2, dtype=float)
+    euv.species = ['all', 'o']
+    euv.bins = np.array([np.arange(5.0, 100.1, 5.0),
+                         np.arange(10.0, 105.1, 5.0)])
+
+    euv.power = {'all': euv.rebin_spectra().sum(axis=1),
+                 'o': np.zeros(shape=euv.dt.shape)}
+    if power is not None:
+        euv.power.update({ss: np.array(power[ss], dtype=float)
+                          for ss in power.keys()})
+
+    return euv
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Tests the IndexCatalog class and functions
+"""
+
+from __future__ import (print_function)
+from solar_index import (IndexCatalog, OMNIvals, F107vals,
+                         index_attributes)
+from nose.tools import assert_raises, raises
+import nose.tools
+import numpy as np
+import threading
+from os import path
+import os
+
+
+class TestCatalog():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.testCat = IndexCatalog(maxsize=2)
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        del self.testCat
+
+    def test_catalog_default_sources(self):
+        """Test that the bundled sources are registered"""
+        assert self.testCat.sources() == ['f107', 'omni', 'see']
+
+    def test_catalog_load_types(self):
+        """Test that sources are loaded through the appropriate parser"""
+        assert isinstance(self.testCat.load('omni'), OMNIvals)
+        assert isinstance(self.testCat.load('F107'), F107vals)
+
+    def test_catalog_shared_copy(self):
+        """Test that repeated loads return the same object"""
+        omni1 = self.testCat.load('omni')
+        omni2 = self.testCat.load('omni', FILE_NAME='omni2_daily_12664.txt')
+        assert omni1 is omni2
+        assert self.testCat.hits == 1
+        assert self.testCat.misses == 1
+
+    def test_catalog_equivalent_paths(self):
+        """Test that equivalent data directories share one copy"""
+        from solar_index import _data_dir
+
+        omni1 = self.testCat.load('omni')
+        omni2 = self.testCat.load('omni', file_dir=_data_dir + os.sep)
+        omni3 = self.testCat.load('omni', file_dir=path.relpath(_data_dir))
+        assert omni1 is omni2
+        assert omni1 is omni3
+        assert len(self.testCat.cached_keys()) == 1
+
+    @raises(TypeError)
+    def test_catalog_unhashable_option(self):
+        """Test for an option that cannot be part of a cache key"""
+        self.testCat.register('omni_list', OMNIvals, file_name=['a', 'b'])
+
+    def test_catalog_read_only(self):
+        """Test that cached arrays may not be modified"""
+        omni = self.testCat.load('omni')
+        assert not omni.F107.flags.writeable
+        assert_raises(ValueError, omni.F107.__setitem__, 0, 1.0)
+
+    def test_catalog_lru_eviction(self):
+        """Test that the least recently used dataset is evicted"""
+        self.testCat.register('omni_copy', OMNIvals)
+        self.testCat.load('omni')
+        self.testCat.load('f107')
+        self.testCat.load('omni')
+        self.testCat.load('omni_copy')
+        assert [kk[0] for kk in self.testCat.cached_keys()] == ['omni',
+                                                                 'omni_copy']
+
+    def test_catalog_threaded_single_read(self):
+        """Test that concurrent requests read a dataset only once"""
+        calls = list()
+
+        def counting_loader(**kwargs):
+            calls.append(1)
+            return OMNIvals(**kwargs)
+
+        self.testCat.register('counted', counting_loader)
+        threads = [threading.Thread(target=self.testCat.load,
+                                    args=('counted',)) for i in range(8)]
+        for tt in threads:
+            tt.start()
+        for tt in threads:
+            tt.join()
+
+        assert len(calls) == 1
+
+    def test_catalog_unregister(self):
+        """Test that unregistering a source drops its cached datasets"""
+        self.testCat.load('omni')
+        self.testCat.unregister('omni')
+        assert self.testCat.cached_keys() == []
+        assert 'omni' not in self.testCat.sources()
+
+    def test_index_attributes(self):
+        """Test the index attributes for each source type"""
+        assert index_attributes('omni', self.testCat.load('omni')) == \
+            ['Rz', 'F107', 'Lalpha']
+        assert index_attributes('f107', self.testCat.load('f107')) == ['F107']
+
+    @raises(TypeError)
+    def test_index_attributes_w_bad_dataset(self):
+        """Test for unsupported dataset type"""
+        index_attributes('bad', 'not a dataset')
+
+    @raises(KeyError)
+    def test_catalog_unknown_source(self):
+        """Test for unregistered source"""
+        self.testCat.load('bad_source')
+
+    @raises(ValueError)
+    def test_catalog_bad_maxsize(self):
+        """Test for non-positive cache size"""
+        IndexCatalog(maxsize=0)
+
+    @raises(TypeError)
+    def test_catalog_bad_loader(self):
+        """Test for non-callable loader"""
+        self.testCat.register('bad', 'not a loader')
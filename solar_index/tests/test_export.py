@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Tests the export functions
+"""
+
+from __future__ import (print_function)
+from solar_index import export, load_index
+from solar_index.tests import synthetic_euv
+from nose.tools import assert_raises, raises
+import nose.tools
+import datetime as dt
+import numpy as np
+import shutil
+import tempfile
+from os import path
+
+
+class TestExport():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.datasets = {'omni': load_index('omni'),
+                         'f107': load_index('f107')}
+        self.split = dt.datetime(2005, 1, 1)
+        self.out_dir = tempfile.mkdtemp()
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        shutil.rmtree(self.out_dir)
+        del self.datasets, self.split, self.out_dir
+
+    def test_daily_indices(self):
+        """Test the alignment of indices on a daily grid"""
+        dates, columns = export.daily_indices(self.datasets)
+
+        assert np.all(np.diff(dates).astype(int) >= 1)
+        assert list(columns.keys()) == ['f107_F107', 'omni_Rz', 'omni_F107',
+                                        'omni_Lalpha']
+        assert dates[0] == np.datetime64('2000-01-01')
+        assert columns['f107_F107'][0] == 125.6
+        # OMNI data starts in 2002, so earlier days are filled
+        assert np.isnan(columns['omni_Rz'][0])
+
+    def test_daily_indices_start_stop(self):
+        """Test the selection of a date range"""
+        dates, columns = export.daily_indices(self.datasets,
+                                              start=dt.datetime(2003, 1, 1),
+                                              stop=dt.datetime(2003, 12, 31))
+        assert len(dates) == 365
+        assert len(columns['omni_F107']) == 365
+
+    def test_to_hdf5_append(self):
+        """Test writing and appending to an HDF5 file"""
+        import h5py
+
+        fname = path.join(self.out_dir, 'indices.h5')
+        dates, columns = export.daily_indices(self.datasets)
+        n1 = export.to_hdf5(fname, self.datasets, stop=self.split,
+                            chunk_days=100)
+        n2 = export.to_hdf5(fname, self.datasets, append=True,
+                            chunk_days=100)
+
+        assert n1 + n2 == len(dates)
+        with h5py.File(fname, 'r') as fin:
+            assert fin['omni_F107'].chunks == (100,)
+            assert np.all(fin['date'][:] == dates.astype(np.int64))
+            assert np.array_equal(fin['omni_F107'][:], columns['omni_F107'],
+                                  equal_nan=True)
+
+    def test_to_zarr_append(self):
+        """Test writing and appending to a Zarr store"""
+        import zarr
+
+        store = path.join(self.out_dir, 'indices.zarr')
+        dates, columns = export.daily_indices(self.datasets)
+        export.to_zarr(store, self.datasets, stop=self.split)
+        export.to_zarr(store, self.datasets, append=True)
+        # Repeating the append does not duplicate days
+        assert export.to_zarr(store, self.datasets, append=True) == 0
+
+        group = zarr.open_group(store, mode='r')
+        assert np.all(group['date'][:] == dates.astype(np.int64))
+        assert np.array_equal(group['f107_F107'][:], columns['f107_F107'],
+                              equal_nan=True)
+
+    def test_to_parquet_append(self):
+        """Test writing and appending to a Parquet directory"""
+        import pyarrow.parquet as pq
+
+        pq_dir = path.join(self.out_dir, 'indices')
+        dates, columns = export.daily_indices(self.datasets)
+        export.to_parquet(pq_dir, self.datasets, stop=self.split)
+        export.to_parquet(pq_dir, self.datasets, append=True)
+
+        table = pq.read_table(pq_dir)
+        assert table.num_rows == len(dates)
+        assert np.array_equal(table['omni_Rz'].to_numpy(), columns['omni_Rz'],
+                              equal_nan=True)
+
+    @raises(ValueError)
+    def test_to_parquet_append_w_bad_columns(self):
+        """Test for appending different columns"""
+        pq_dir = path.join(self.out_dir, 'indices')
+        export.to_parquet(pq_dir, self.datasets)
+        export.to_parquet(pq_dir, {'omni': self.datasets['omni']},
+                          append=True)
+
+    @raises(ValueError)
+    def test_to_hdf5_append_w_bad_columns(self):
+        """Test for appending fewer arrays than the HDF5 file holds"""
+        fname = path.join(self.out_dir, 'indices.h5')
+        export.to_hdf5(fname, self.datasets, stop=self.split)
+        export.to_hdf5(fname, {'omni': self.datasets['omni']}, append=True)
+
+    @raises(ValueError)
+    def test_to_zarr_append_w_bad_columns(self):
+        """Test for appending fewer arrays than the Zarr store holds"""
+        store = path.join(self.out_dir, 'indices.zarr')
+        export.to_zarr(store, self.datasets, stop=self.split)
+        export.to_zarr(store, {'omni': self.datasets['omni']}, append=True)
+
+    @raises(ValueError)
+    def test_include_spectra_wo_euv(self):
+        """Test for spectra requested without EUV data"""
+        export.to_hdf5(path.join(self.out_dir, 'indices.h5'), self.datasets,
+                       include_spectra=True)
+
+    @raises(TypeError)
+    def test_export_w_bad_dataset(self):
+        """Test for unsupported dataset type"""
+        export.daily_indices({'bad': 'not a dataset'})
+
+
+class TestExportSpectra():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        # Days 2002-01-05 and 2002-01-06 have no spectra, while 2002-01-03
+        # has two spectra with different flux
+        times = [dt.datetime(2002, 1, 1), dt.datetime(2002, 1, 2),
+                 dt.datetime(2002, 1, 3), dt.datetime(2002, 1, 3, 12),
+                 dt.datetime(2002, 1, 4), dt.datetime(2002, 1, 7),
+                 dt.datetime(2002, 1, 8)]
+        self.datasets = {'omni': load_index('omni'),
+                         'see': synthetic_euv(times,
+                                              flux=[1, 1, 2, 4, 1, 1, 1])}
+        self.start = dt.datetime(2002, 1, 1)
+        self.stop = dt.datetime(2002, 1, 10)
+        self.out_dir = tempfile.mkdtemp()
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        shutil.rmtree(self.out_dir)
+        del self.datasets, self.start, self.stop, self.out_dir
+
+    def check_spectra(self, spectra):
+        """Checks the stored spectra against the synthetic EUV data"""
+        assert spectra.shape == (10, 20)
+        # Each 5 nm bin sums five 1 nm samples
+        assert np.all(spectra[[0, 1, 3, 6, 7]] == 5.0)
+        # Spectra within the same day are averaged
+        assert np.all(spectra[2] == 15.0)
+        # Days without spectra are filled
+        assert np.all(np.isnan(spectra[[4, 5, 8, 9]]))
+
+    def test_rebin_spectra(self):
+        """Test the rebinning of a range of spectra"""
+        bin_flux = self.datasets['see'].rebin_spectra(start=2, stop=4)
+        assert bin_flux.shape == (2, 20)
+        assert np.all(bin_flux[0] == 10.0)
+        assert np.all(bin_flux[1] == 20.0)
+
+    def test_daily_indices_power(self):
+        """Test the EUV index and power columns"""
+        dates, columns = export.daily_indices(self.datasets, start=self.start,
+                                              stop=self.stop)
+
+        assert 'see_power_all' in columns and 'see_power_o' in columns
+        assert columns['see_power_all'][0] == 100.0
+        assert columns['see_power_all'][2] == 300.0
+        assert columns['see_He2'][2] == 2.5
+        assert np.isnan(columns['see_power_all'][4])
+
+    def test_to_hdf5_spectra_append(self):
+        """Test writing and appending spectra to an HDF5 file"""
+        import h5py
+
+        fname = path.join(self.out_dir, 'indices.h5')
+        export.to_hdf5(fname, self.datasets, include_spectra=True,
+                       chunk_days=4, start=self.start,
+                       stop=dt.datetime(2002, 1, 3))
+        export.to_hdf5(fname, self.datasets, include_spectra=True,
+                       append=True, chunk_days=4, start=self.start,
+                       stop=self.stop)
+
+        with h5py.File(fname, 'r') as fin:
+            assert fin['see_spectra'].chunks == (4, 20)
+            assert np.all(fin['see_spectra'].attrs['bin_min'] ==
+                          self.datasets['see'].bins[0])
+            assert np.all(fin['see_spectra'].attrs['bin_max'] ==
+                          self.datasets['see'].bins[1])
+            assert fin['see_power_o'].shape == (10,)
+            self.check_spectra(fin['see_spectra'][:])
+
+    def test_to_zarr_spectra_append(self):
+        """Test writing and appending spectra to a Zarr store"""
+        import zarr
+
+        store = path.join(self.out_dir, 'indices.zarr')
+        export.to_zarr(store, self.datasets, include_spectra=True,
+                       chunk_days=4, start=self.start,
+                       stop=dt.datetime(2002, 1, 3))
+        export.to_zarr(store, self.datasets, include_spectra=True,
+                       append=True, chunk_days=4, start=self.start,
+                       stop=self.stop)
+
+        group = zarr.open_group(store, mode='r')
+        assert group['see_spectra'].chunks == (4, 20)
+        assert list(group['see_spectra'].attrs['bin_min']) == \
+            list(self.datasets['see'].bins[0])
+        assert list(group['see_spectra'].attrs['bin_max']) == \
+            list(self.datasets['see'].bins[1])
+        self.check_spectra(group['see_spectra'][:])
+
+    @raises(ValueError)
+    def test_append_spectra_to_store_wo_spectra(self):
+        """Test for appending spectra to a store without them"""
+        fname = path.join(self.out_dir, 'indices.h5')
+        export.to_hdf5(fname, self.datasets, start=self.start,
+                       stop=self.stop)
+        export.to_hdf5(fname, self.datasets, include_spectra=True,
+                       append=True)
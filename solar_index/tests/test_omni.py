@@ -7,7 +7,7 @@
 """
 
 from __future__ import (print_function)
-from solar_index import OMNIvals
+from solar_index import OMNIvals, F107vals
 from nose.tools import assert_raises, raises
 import nose.tools
 import numpy as np
@@ -32,3 +32,31 @@ class TestOMNI():
     def test_omni_load_w_bad_file_name(self):
         """Test for non-existent file"""
         testOMNI = OMNIvals(file_name='bad_data.txt')
+
+
+class TestF107():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.testF107 = F107vals()
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        del self.testF107
+
+    def test_f107_load_skips_header(self):
+        """Test that the header row is skipped and fill values replaced"""
+        assert self.testF107.year[0] == 2000
+        assert self.testF107.F107[0] == 125.6
+        assert np.all(self.testF107.F107[~np.isnan(self.testF107.F107)] <
+                      999.9)
+
+    @raises(OSError)
+    def test_f107_load_w_bad_directory(self):
+        """Test for non-existent directory"""
+        testF107 = F107vals(file_dir='bad_data')
+
+    @raises(OSError)
+    def test_f107_load_w_bad_file_name(self):
+        """Test for non-existent file"""
+        testF107 = F107vals(file_name='bad_data.txt')
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright (C) 2018, JK & AGB
+# Full license can be found in License.md
+# -----------------------------------------------------------------------------
+""" Tests the IndexServer class and functions
+"""
+
+from __future__ import (print_function)
+from nose.tools import assert_raises, raises
+import nose.tools
+import datetime as dt
+import json
+import numpy as np
+import socket
+import sys
+import time
+
+if sys.version_info < (3, 7):
+    from nose.plugins.skip import SkipTest
+    raise SkipTest("solar_index.server requires python 3.7 or later")
+
+import asyncio
+from solar_index import server, IndexCatalog
+from solar_index.tests import synthetic_euv
+
+
+class TestServer():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.testServer = server.IndexServer(sources=['omni'])
+        self.listener = self.loop.run_until_complete(
+            self.testServer.serve(port=0))
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        self.listener.close()
+        self.loop.run_until_complete(self.listener.wait_closed())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.testServer.close()
+        del self.loop, self.testServer, self.listener, self.port
+
+    def test_query_date_range(self):
+        """Test a query for an inclusive range of days"""
+        body = self.loop.run_until_complete(self.testServer.query(
+            source='omni', index='F107', start='2003-01-01',
+            stop='2003-01-03'))
+        response = json.loads(body.decode('utf-8'))
+
+        assert response['dates'][0] == '2003-01-01T00:00:00'
+        assert len(response['values']) == 3
+
+    def test_query_coalesced(self):
+        """Test that concurrent identical queries are computed once"""
+        queries = [self.testServer.query(source='omni', index='Rz')
+                   for i in range(20)]
+        bodies = self.loop.run_until_complete(asyncio.gather(*queries))
+
+        assert all([bb is bodies[0] for bb in bodies])
+        assert self.testServer.stats['computed'] == 1
+        assert self.testServer.stats['coalesced'] == 19
+
+    def test_query_cached(self):
+        """Test that repeated queries are answered from the cache"""
+        for i in range(2):
+            self.loop.run_until_complete(self.testServer.query(
+                source='omni', index='Lalpha', stop='2002-12-31'))
+
+        assert self.testServer.stats['computed'] == 1
+        assert self.testServer.stats['cache_hits'] == 1
+
+    def test_cache_size_bounded(self):
+        """Test that the response cache is kept below its size limit"""
+        self.testServer.max_cache_bytes = 2000
+        for day in range(1, 20):
+            self.loop.run_until_complete(self.testServer.query(
+                source='omni', index='F107',
+                stop='2002-01-{:02d}'.format(day)))
+
+        assert self.testServer._cache_bytes <= 2000
+        assert 0 < len(self.testServer._cache) < 19
+
+    @raises(ValueError)
+    def test_query_w_bad_index(self):
+        """Test for an index the source does not have"""
+        self.loop.run_until_complete(self.testServer.query(
+            source='omni', index='He2'))
+
+    @raises(ValueError)
+    def test_query_w_bad_date(self):
+        """Test for a badly formatted date"""
+        self.loop.run_until_complete(self.testServer.query(
+            source='omni', index='F107', start='2003/01/01'))
+
+    def test_http_status(self):
+        """Test the HTTP status codes"""
+        for target, code in [('/index?source=omni&index=F107', 200),
+                             ('/index?source=omni&index=bad', 400),
+                             ('/sources', 200), ('/bad_path', 404)]:
+            status, elapsed = self.loop.run_until_complete(
+                server._timed_request('127.0.0.1', self.port, None, target))
+            assert status == code
+
+    def test_idle_client_timeout(self):
+        """Test that a client sending nothing is answered with a timeout"""
+        self.testServer.read_timeout = 0.1
+
+        def idle_request():
+            sock = socket.create_connection(('127.0.0.1', self.port),
+                                            timeout=2.0)
+            response = sock.recv(1024)
+            sock.close()
+            return response
+
+        response = self.loop.run_until_complete(
+            self.loop.run_in_executor(None, idle_request))
+        assert response.startswith(b'HTTP/1.1 408')
+
+    def test_load_test(self):
+        """Test the load test harness against a running server"""
+        results = self.loop.run_until_complete(server.load_test(
+            port=self.port, clients=20, requests=2))
+
+        assert results['requests'] == 40
+        assert results['errors'] == 0
+        assert self.testServer.stats['computed'] == 3
+
+
+class TestServerEUV():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # He II and the oxygen power are missing on the second day
+        self.euv = synthetic_euv([dt.datetime(2002, 1, 1) +
+                                  dt.timedelta(days=i) for i in range(4)],
+                                 he2=[1.0, np.nan, 3.0, 4.0],
+                                 power={'o': [1.0, np.nan, 3.0, 4.0]})
+        catalog = IndexCatalog(register_defaults=False)
+        catalog.register('see', lambda: self.euv)
+        self.testServer = server.IndexServer(sources=['see'], catalog=catalog)
+        self.loop.run_until_complete(self.testServer.load())
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.testServer.close()
+        del self.loop, self.euv, self.testServer
+
+    def run_query(self, **kwargs):
+        """Runs a query and decodes the response"""
+        body = self.loop.run_until_complete(self.testServer.query(**kwargs))
+        return json.loads(body.decode('utf-8'))
+
+    def test_query_power(self):
+        """Test a power query, with nulls for missing values"""
+        response = self.run_query(source='see', index='power', species='o')
+
+        assert response['species'] == 'o'
+        assert len(response['dates']) == 4
+        assert response['values'] == [1.0, None, 3.0, 4.0]
+
+    def test_query_he2(self):
+        """Test a He II query, with nulls for missing values"""
+        response = self.run_query(source='see', index='He2',
+                                  start='2002-01-02', stop='2002-01-03')
+
+        assert response['species'] is None
+        assert response['values'] == [None, 3.0]
+
+    def test_query_spectra(self):
+        """Test a rebinned spectra query"""
+        response = self.run_query(source='see', index='spectra',
+                                  start='2002-01-02', stop='2002-01-04')
+        values = np.array(response['values'])
+
+        assert values.shape == (3, 20)
+        assert np.all(values == 5.0)
+        assert np.all(np.array(response['bins']) == self.euv.bins)
+
+    def test_sources(self):
+        """Test that the power species and spectra are listed"""
+        status, body = self.loop.run_until_complete(
+            self.testServer._route('GET', '/sources'))
+        sources = json.loads(body.decode('utf-8'))
+
+        assert status == '200 OK'
+        assert sources['see']['indices'] == ['cor_1au', 'He2', 'power',
+                                             'spectra']
+        assert sources['see']['species'] == ['all', 'o']
+
+    @raises(ValueError)
+    def test_query_power_w_bad_species(self):
+        """Test for a power query with an unknown species"""
+        self.run_query(source='see', index='power', species='n2')
+
+    @raises(ValueError)
+    def test_query_power_wo_species(self):
+        """Test for a power query without a species"""
+        self.run_query(source='see', index='power')
+
+    def test_query_leader_cancelled(self):
+        """Test that coalesced queries complete if the first is cancelled"""
+        answer = self.testServer._answer
+
+        def slow_answer(*key):
+            time.sleep(0.2)
+            return answer(*key)
+
+        self.testServer._answer = slow_answer
+        leader = self.loop.create_task(self.testServer.query(source='see',
+                                                             index='He2'))
+        follower = self.loop.create_task(self.testServer.query(source='see',
+                                                               index='He2'))
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        leader.cancel()
+
+        body = self.loop.run_until_complete(asyncio.wait_for(follower, 2.0))
+        assert json.loads(body.decode('utf-8'))['values'][0] == 1.0
+        assert self.testServer.stats['coalesced'] == 1
+        assert self.testServer._inflight == {}
+
+    def test_query_coalesced_error(self):
+        """Test that coalesced queries all receive the same error"""
+        def bad_answer(*key):
+            time.sleep(0.05)
+            raise RuntimeError("bad answer")
+
+        self.testServer._answer = bad_answer
+        queries = [self.testServer.query(source='see', index='He2')
+                   for i in range(3)]
+        results = self.loop.run_until_complete(
+            asyncio.gather(*queries, return_exceptions=True))
+
+        assert all([isinstance(rr, RuntimeError) for rr in results])
+        assert self.testServer.stats['coalesced'] == 2
+        assert self.testServer._inflight == {}
+        assert len(self.testServer._cache) == 0
+
+
+class TestServerHarness():
+
+    def setup(self):
+        """Runs before every method to create a clean testing setup."""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def teardown(self):
+        """Runs after every method to clean up previous testing."""
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        del self.loop
+
+    def test_load_test_w_empty_response(self):
+        """Test that connections closed without a reply count as errors"""
+        def close_connection(reader, writer):
+            writer.close()
+
+        listener = self.loop.run_until_complete(asyncio.start_server(
+            close_connection, host='127.0.0.1', port=0))
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            results = self.loop.run_until_complete(server.load_test(
+                port=port, clients=3, requests=2))
+        finally:
+            listener.close()
+            self.loop.run_until_complete(listener.wait_closed())
+
+        assert results['requests'] == 6
+        assert results['errors'] == 6
+
+    def test_main_w_bad_see_dir(self):
+        """Test that an unloadable SEE file exits without a traceback"""
+        from solar_index.catalog import default_catalog
+
+        sources = dict(default_catalog._sources)
+        assert_raises(SystemExit, server.main,
+                      ['serve', '--port', '0', '--see-dir', 'bad_data'])
+        # The process-wide catalog is left unchanged
+        assert default_catalog._sources == sources